@@ -36,8 +36,10 @@ class DestinationAgent(BaseAgent):
             num_results=5
         )
         
-        # Search vector store for similar experiences
-        query_embedding = await self.embedding_tool.encode_text(f"{destination} {' '.join(vibes)}")
+        # Search vector store for similar experiences; sorting the vibes keeps query texts
+        # (and their cached embeddings) repeatable regardless of the order they were picked in
+        query_vibes = sorted(set(vibes))
+        query_embedding = await self.embedding_tool.encode_text(f"{destination} {' '.join(query_vibes)}")
         similar_experiences = await self.vector_store.search_experiences(query_embedding[0], limit=5)
         
         user_prompt = f"""
@@ -6,6 +6,22 @@ from typing import Dict, Any, List
 import asyncio
 import json
 
+_SYSTEM_PROMPT = """You are the TripCraft AI Orchestrator. Coordinate specialized agents to create comprehensive travel plans.
+        Analyze the request and determine which agents to call and in what order. Ensure all aspects are covered."""
+
+_AGENT_CATALOG_PROMPT = """
+        Available Agents:
+        - destination: Research attractions, activities, local insights
+        - transport: Find flights, trains, local transportation
+        - accommodation: Search hotels, apartments, unique stays
+        - dining: Restaurant recommendations, food experiences
+        - budget: Optimize costs, find deals, budget breakdown
+        - audio_tour: Generate immersive audio content
+        - multimodal: Process images, voice, mood analysis
+        
+        Create a coordination plan and execute agents in optimal order.
+        """
+
 class OrchestratorAgent(BaseAgent):
     def __init__(self):
         super().__init__("TripCraft Orchestrator", "Coordinate all travel planning agents")
@@ -18,57 +34,45 @@ class OrchestratorAgent(BaseAgent):
     async def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Orchestrate multi-agent travel planning"""
         
-        system_prompt = """You are the TripCraft AI Orchestrator. Coordinate specialized agents to create comprehensive travel plans.
-        Analyze the request and determine which agents to call and in what order. Ensure all aspects are covered."""
-        
+        # Only the request varies; the prompt text around it is built once at import
         user_prompt = f"""
         Travel Planning Request: {json.dumps(request, indent=2)}
+        """ + _AGENT_CATALOG_PROMPT
         
-        Available Agents:
-        - destination: Research attractions, activities, local insights
-        - transport: Find flights, trains, local transportation
-        - accommodation: Search hotels, apartments, unique stays
-        - dining: Restaurant recommendations, food experiences
-        - budget: Optimize costs, find deals, budget breakdown
-        - audio_tour: Generate immersive audio content
-        - multimodal: Process images, voice, mood analysis
-        
-        Create a coordination plan and execute agents in optimal order.
-        """
-        
-        coordination_plan = await self.call_ollama(user_prompt, system_prompt)
+        # The coordination plan is informational only, so it is generated
+        # alongside the agents rather than ahead of them
+        plan_task = asyncio.ensure_future(self.call_ollama(user_prompt, _SYSTEM_PROMPT))
         
         # Execute agents based on coordination plan
         results = {}
         
         # Core agents execution in parallel where possible
-        core_tasks = []
-        
-        if "destination" in self.agents:
-            core_tasks.append(self._execute_agent("destination", request))
-        if "transport" in self.agents:
-            core_tasks.append(self._execute_agent("transport", request))
-        if "accommodation" in self.agents:
-            core_tasks.append(self._execute_agent("accommodation", request))
-        if "dining" in self.agents:
-            core_tasks.append(self._execute_agent("dining", request))
-            
-        core_results = await asyncio.gather(*core_tasks, return_exceptions=True)
+        core_names = [name for name in ("destination", "transport", "accommodation", "dining") if name in self.agents]
+        core_results = await asyncio.gather(
+            *(self._execute_agent(name, request) for name in core_names),
+            return_exceptions=True
+        )
         
         # Process core results
-        agent_names = ["destination", "transport", "accommodation", "dining"]
-        for i, result in enumerate(core_results):
-            if not isinstance(result, Exception) and i < len(agent_names):
-                results[agent_names[i]] = result
+        for name, result in zip(core_names, core_results):
+            if not isinstance(result, Exception):
+                results[name] = result
         
-        # Execute dependent agents
+        # Dependent agents only read the core results, so they run side by side
+        dependent_names = []
         if "budget" in self.agents:
-            budget_request = {**request, "agent_results": results}
-            results["budget"] = await self._execute_agent("budget", budget_request)
-            
+            dependent_names.append("budget")
         if "audio_tour" in self.agents and request.get("include_audio_tour"):
-            audio_request = {**request, "agent_results": results}
-            results["audio_tour"] = await self._execute_agent("audio_tour", audio_request)
+            dependent_names.append("audio_tour")
+        
+        if dependent_names:
+            dependent_request = {**request, "agent_results": dict(results)}
+            dependent_results = await asyncio.gather(
+                *(self._execute_agent(name, dependent_request) for name in dependent_names)
+            )
+            results.update(zip(dependent_names, dependent_results))
+        
+        coordination_plan = await plan_task
         
         return {
             "coordination_plan": coordination_plan,
@@ -48,12 +48,11 @@ async def transcribe_voice(
 ) -> JSONResponse:
     """Transcribe voice input to travel preferences"""
     try:
-        # Read and encode audio
+        # Read audio and hand the raw bytes straight to the transcriber
         audio_content = await audio.read()
-        base64_audio = base64.b64encode(audio_content).decode('utf-8')
         
         # Transcribe audio
-        transcription = await multimodal_service.transcribe_voice(base64_audio)
+        transcription = await multimodal_service.transcribe_audio_bytes(audio_content)
         
         # Extract travel intent from transcription
         # This would typically involve NLP processing
@@ -104,8 +103,7 @@ async def process_multimodal_inputs(
         # Process voice
         if audio:
             audio_content = await audio.read()
-            base64_audio = base64.b64encode(audio_content).decode('utf-8')
-            results["voice_analysis"] = await multimodal_service.transcribe_voice(base64_audio)
+            results["voice_analysis"] = await multimodal_service.transcribe_audio_bytes(audio_content)
         
         # Combine all insights
         results["combined_preferences"] = _combine_multimodal_insights(results)
@@ -4,16 +4,20 @@ api/realtime.py - Real-time Updates API Endpoints
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.responses import JSONResponse
 from typing import Dict, Any
-from services.realtime_service import RealtimeService
+from services.realtime_service import get_realtime_service
 from models.travel_response import ReplanningRequest, RealtimeUpdate
 from utils.logger import get_logger
-import json
+import orjson
 import asyncio
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-realtime_service = RealtimeService()
+realtime_service = get_realtime_service()
+
+def _dumps(message: Dict[str, Any]) -> str:
+    """Serialize a websocket message (orjson also handles the datetimes in updates)"""
+    return orjson.dumps(message).decode()
 
 class ConnectionManager:
     def __init__(self):
@@ -44,7 +48,7 @@ class ConnectionManager:
     async def send_update(self, trip_id: str, update: dict):
         if trip_id in self.active_connections:
             try:
-                await self.active_connections[trip_id].send_text(json.dumps(update))
+                await self.active_connections[trip_id].send_text(_dumps(update))
             except Exception as e:
                 logger.warning(f"Failed to send update to {trip_id}: {e}")
                 self.disconnect(trip_id)
@@ -72,7 +76,7 @@ async def websocket_endpoint(websocket: WebSocket, trip_id: str):
     
     try:
         # Send initial connection confirmation
-        await websocket.send_text(json.dumps({
+        await websocket.send_text(_dumps({
             "type": "connected",
             "trip_id": trip_id,
             "message": "WebSocket connection established"
@@ -82,7 +86,7 @@ async def websocket_endpoint(websocket: WebSocket, trip_id: str):
         try:
             updates = await realtime_service.get_updates(trip_id)
             if updates:
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(_dumps({
                     "type": "initial_updates",
                     "data": [update.dict() for update in updates]
                 }))
@@ -92,22 +96,22 @@ async def websocket_endpoint(websocket: WebSocket, trip_id: str):
         # Keep connection alive and handle messages
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             # Handle different message types
             if message.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await websocket.send_text(_dumps({"type": "pong"}))
                 
             elif message.get("type") == "get_updates":
                 try:
                     updates = await realtime_service.get_updates(trip_id)
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(_dumps({
                         "type": "updates",
                         "data": [update.dict() for update in updates]
                     }))
                 except Exception as e:
                     logger.error(f"Error getting updates for {trip_id}: {e}")
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(_dumps({
                         "type": "error",
                         "message": "Failed to get updates"
                     }))
@@ -117,13 +121,13 @@ async def websocket_endpoint(websocket: WebSocket, trip_id: str):
                     result = await realtime_service.trigger_replanning(
                         trip_id, message.get("event_details", {})
                     )
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(_dumps({
                         "type": "replan_result",
                         "data": result
                     }))
                 except Exception as e:
                     logger.error(f"Error triggering replan for {trip_id}: {e}")
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(_dumps({
                         "type": "error",
                         "message": "Failed to trigger replan"
                     }))
@@ -8,7 +8,7 @@ from models.travel_request import TravelPlanningRequest, TravelMode
 from models.travel_response import TravelPlanResponse, ReplanningRequest
 from services.travel_service import TravelPlanningService
 from utils.logger import get_logger
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 import json
 from datetime import datetime
 
@@ -365,13 +365,39 @@ async def download_offline_package(trip_id: str) -> Response:
         logger.error(f"Error creating offline package: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/plan/{trip_id}/ics")
+async def download_trip_calendar(trip_id: str, timezone: str = "UTC") -> StreamingResponse:
+    """Stream the trip itinerary as an ICS calendar"""
+    try:
+        from utils.ics_export import iter_ics_lines
+        
+        if trip_id.startswith("demo-"):
+            itinerary = await _get_demo_plan(trip_id)
+        elif trip_id in travel_plans_storage:
+            itinerary = TravelPlanResponse(**travel_plans_storage[trip_id]["plan"])
+        else:
+            raise HTTPException(status_code=404, detail=f"Plan {trip_id} not found")
+        
+        # Events are serialized as the response is written, not up front
+        return StreamingResponse(
+            iter_ics_lines(itinerary, timezone),
+            media_type="text/calendar; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename=trip_{trip_id}.ics"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting calendar for {trip_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/plan/{trip_id}/verify")
 async def verify_trip_facts(trip_id: str, claims: List[str]) -> JSONResponse:
     """Verify factual claims in trip plan"""
     try:
-        from services.verify_service import FactVerificationService
+        from services.verify_service import get_service
         
-        verification_service = FactVerificationService()
+        verification_service = get_service()
         citations = await verification_service.verify_claims(claims, top_k=3)
         
         return JSONResponse(content={
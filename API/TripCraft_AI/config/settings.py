@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    # Download local model files at import, once, before pre-fork workers (gunicorn --preload) start
+    PRELOAD_MODELS: bool = False
     
     # Free API Keys (Optional)
     HUGGINGFACE_TOKEN: Optional[str] = None  # Free tier available
@@ -20,6 +22,7 @@ class Settings(BaseSettings):
     # Vector Database
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: Optional[str] = None
+    QDRANT_PREFER_GRPC: bool = True  # gRPC on port 6334; disable if only REST is exposed
     
     # LLM API Configuration (Priority: Groq → Gemini → Ollama)
     # Groq Cloud (Primary - Fast inference)
@@ -36,11 +39,16 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "gemma2:2b"
     OLLAMA_EMBED_MODEL: str = "nomic-embed-text"
+    # Keep the quantized model resident between agent calls instead of reloading it
+    OLLAMA_KEEP_ALIVE: str = "30m"
     
     # Free Embedding Models
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     MULTIMODAL_MODEL: str = "microsoft/resnet-50"  # Free alternative
     
+    # Web search (DuckDuckGo); optional proxy URL, e.g. "socks5://127.0.0.1:9150"
+    DDG_PROXY: Optional[str] = None
+    
     # MCP Settings
     MCP_TIMEOUT: int = 60
     
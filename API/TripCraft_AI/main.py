@@ -6,6 +6,7 @@ import os
 from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
@@ -21,6 +22,8 @@ from api.realtime import router as realtime_router
 from config.settings import get_settings
 from utils.logger import setup_logger
 from services.ollama_manager import ollama_manager
+from services.llm_manager import llm_manager
+from utils.http_client import close_http_client
 
 # Setup logger
 logger = setup_logger()
@@ -28,6 +31,31 @@ logger = setup_logger()
 import sys
 import asyncio
 
+def prefetch_model_files():
+    """Download the local models' files in this (parent) process"""
+    from huggingface_hub import snapshot_download
+    from faster_whisper import download_model
+    from tools.embedding_tool import _IMAGE_MODEL_ID, _onnx_embedding_file
+    
+    # Only files are fetched here: ONNX Runtime, CTranslate2 and torch thread pools do not
+    # survive fork(), so each worker still builds its own inference sessions on first use
+    logger.info("Prefetching model files...")
+    snapshot_download(
+        get_settings().EMBEDDING_MODEL,
+        allow_patterns=["*.json", "*.txt", "*.safetensors", "1_Pooling/*", _onnx_embedding_file()]
+    )
+    snapshot_download(_IMAGE_MODEL_ID, allow_patterns=["*.json", "*.safetensors"])
+    download_model("base")
+    logger.info("Model files ready")
+
+# Fetching at import means gunicorn --preload downloads everything once in the master,
+# instead of every worker racing to download the same files on its first request
+if get_settings().PRELOAD_MODELS:
+    try:
+        prefetch_model_files()
+    except Exception as e:
+        logger.warning(f"Model prefetch failed, models will download on first use: {e}")
+
 # Fix for Playwright / subprocess issues on Windows asyncio
 if sys.platform.startswith("win"):
     try:
@@ -40,6 +68,8 @@ async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
     logger.info("Starting TripCraft AI Application...")
     
+    vector_store = None
+    
     # Initialize services on startup with error handling
     try:
         # Warm up Ollama model first
@@ -76,6 +106,15 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         logger.info("Shutting down TripCraft AI Application...")
+        if vector_store is not None:
+            # Write out any batched experiences before exit
+            await vector_store.close()
+        await llm_manager.aclose()
+        await close_http_client()
+        # The verification service is imported lazily; only close it if it was loaded
+        verify_module = sys.modules.get("services.verify_service")
+        if verify_module is not None:
+            await verify_module.close_service()
 
 # Create FastAPI app
 app = FastAPI(
@@ -84,6 +123,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -12,31 +12,41 @@ import csv
 import os
 import sys
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import uuid
 
 import httpx
 import asyncio
+import numpy as np
+import orjson
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from sentence_transformers import SentenceTransformer
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import get_settings
+from tools.embedding_tool import load_sentence_transformer
 
 class POISeeder:
     def __init__(self, qdrant_url: str = "http://localhost:6333", api_key: str = None):
         self.settings = get_settings()
-        self.qdrant_client = QdrantClient(url=qdrant_url, api_key=api_key)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.qdrant_client = QdrantClient(
+            url=qdrant_url,
+            api_key=api_key,
+            prefer_grpc=self.settings.QDRANT_PREFER_GRPC
+        )
+        self.embedding_model = load_sentence_transformer('all-MiniLM-L6-v2')
         self.collection_name = "travel_pois"
         
         # Rate limiting for free APIs
         self.last_request_time = 0
         self.request_delay = 1.0  # 1 second between requests
         
+        # City name -> (lat, lon), or None when OpenTripMap has no match; kept on disk across runs
+        self._geocode_cache_file = Path(__file__).parent.parent / "data" / "geocode_cache.json"
+        self._geocode_cache: Dict[str, Optional[Tuple[float, float]]] = self._load_geocode_cache()
+        
         # Progress tracking
         self.total_processed = 0
         self.successful_inserts = 0
@@ -63,7 +73,15 @@ class POISeeder:
                 vectors_config=models.VectorParams(
                     size=384,  # all-MiniLM-L6-v2 embedding size
                     distance=models.Distance.COSINE
-                )
+                ),
+                # int8 scalar quantization keeps a 4x smaller copy of the vectors in RAM
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        always_ram=True
+                    )
+                ),
+                hnsw_config=models.HnswConfigDiff(m=16)
             )
             print(f"Created collection: {self.collection_name}")
             
@@ -71,29 +89,58 @@ class POISeeder:
             print(f"Error setting up collection: {e}")
             raise
 
-    async def fetch_opentripmap_pois(self, city: str, radius: int = 10000, limit: int = 100) -> List[Dict]:
-        """Fetch POIs from OpenTripMap (free API)"""
+    def _load_geocode_cache(self) -> Dict[str, Optional[Tuple[float, float]]]:
+        """Load geocoding results saved by earlier runs"""
+        try:
+            data = orjson.loads(self._geocode_cache_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+        return {city: tuple(coords) if coords else None for city, coords in data.items()}
+
+    def _save_geocode_cache(self):
+        """Write the geocoding cache to disk (atomically, via a per-process temp file)"""
+        try:
+            self._geocode_cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._geocode_cache_file.with_name(f"{self._geocode_cache_file.stem}.{os.getpid()}.tmp")
+            tmp_file.write_bytes(orjson.dumps(self._geocode_cache))
+            os.replace(tmp_file, self._geocode_cache_file)
+        except OSError as e:
+            print(f"Could not save geocode cache: {e}")
+
+    async def geocode_city(self, client: httpx.AsyncClient, city: str, base_url: str) -> Optional[Tuple[float, float]]:
+        """Resolve city coordinates, reusing earlier lookups of the same city"""
+        key = city.strip().lower()
+        if key in self._geocode_cache:
+            return self._geocode_cache[key]
+        
         await self.rate_limit()
+        geocode_response = await client.get(f"{base_url}/geoname", params={"name": city}, timeout=10.0)
         
+        if geocode_response.status_code != 200:
+            # Not cached: transient failures are retried on the next lookup
+            print(f"Failed to geocode {city}")
+            return None
+        
+        city_data = orjson.loads(geocode_response.content)
+        coordinates = (city_data["lat"], city_data["lon"]) if city_data else None
+        self._geocode_cache[key] = coordinates
+        self._save_geocode_cache()
+        return coordinates
+
+    async def fetch_opentripmap_pois(self, city: str, radius: int = 10000, limit: int = 100) -> List[Dict]:
+        """Fetch POIs from OpenTripMap (free API)"""
         # OpenTripMap is free, no API key needed for basic usage
         base_url = "https://api.opentripmap.com/0.1/en/places"
         
         try:
             async with httpx.AsyncClient() as client:
                 # First get city coordinates
-                geocode_url = f"{base_url}/geoname"
-                geocode_response = await client.get(geocode_url, params={"name": city})
-                
-                if geocode_response.status_code != 200:
-                    print(f"Failed to geocode {city}")
-                    return []
-                
-                city_data = geocode_response.json()
-                if not city_data:
+                coordinates = await self.geocode_city(client, city, base_url)
+                if coordinates is None:
                     print(f"No geocoding results for {city}")
                     return []
                 
-                lat, lon = city_data["lat"], city_data["lon"]
+                lat, lon = coordinates
                 
                 # Fetch POIs around the city
                 pois_url = f"{base_url}/radius"
@@ -112,7 +159,7 @@ class POISeeder:
                     print(f"Failed to fetch POIs for {city}")
                     return []
                 
-                pois_data = pois_response.json()
+                pois_data = orjson.loads(pois_response.content)
                 
                 # Fetch detailed info for each POI
                 detailed_pois = []
@@ -125,7 +172,7 @@ class POISeeder:
                         detail_response = await client.get(detail_url)
                         
                         if detail_response.status_code == 200:
-                            detail_data = detail_response.json()
+                            detail_data = orjson.loads(detail_response.content)
                             detailed_pois.append({
                                 "id": poi_id,
                                 "name": detail_data.get("name", "Unknown"),
@@ -183,25 +230,25 @@ class POISeeder:
         
         return pois
 
+    @staticmethod
+    def _poi_text(poi: Dict) -> str:
+        """Combine POI text fields for embedding"""
+        return f"{poi['name']} {poi.get('description', '')} {poi['city']} {' '.join(poi.get('tags', []))}"
+
     def create_embedding(self, poi: Dict) -> List[float]:
         """Create embedding for POI"""
-        # Combine text fields for embedding
-        text_content = f"{poi['name']} {poi.get('description', '')} {poi['city']} {' '.join(poi.get('tags', []))}"
-        embedding = self.embedding_model.encode(text_content)
+        embedding = self.embedding_model.encode(self._poi_text(poi), normalize_embeddings=True)
         return embedding.tolist()
 
     def batch_insert_pois(self, pois: List[Dict], batch_size: int = 64):
-        """Insert POIs into Qdrant in batches"""
-        points = []
-        
-        for i, poi in enumerate(pois):
-            try:
-                embedding = self.create_embedding(poi)
-                
-                point = models.PointStruct(
-                    id=str(uuid.uuid4()),   # valid unique UUID for Qdrant
-                    vector=embedding,
-                    payload={
+        """Insert POIs into Qdrant in batches, encoding each batch in one forward pass"""
+        for start in range(0, len(pois), batch_size):
+            texts = []
+            payloads = []
+            for poi in pois[start:start + batch_size]:
+                try:
+                    texts.append(self._poi_text(poi))
+                    payloads.append({
                         "name": poi["name"],
                         "city": poi.get("city", ""),
                         "description": poi.get("description", ""),
@@ -210,32 +257,52 @@ class POISeeder:
                         "tags": poi.get("tags", []),
                         "rating": poi.get("rating", 0),
                         "url": poi.get("url", "")
-                    }
+                    })
+                except Exception as e:
+                    print(f"Error processing POI {poi.get('name', 'Unknown')}: {e}")
+                    continue
+            
+            if not texts:
+                continue
+            
+            try:
+                embeddings = self.embedding_model.encode(
+                    texts, batch_size=batch_size, convert_to_numpy=True,
+                    normalize_embeddings=True, show_progress_bar=False
+                )
+                # Columnar batch: one ids/vectors/payloads list each instead of a PointStruct per POI
+                points = models.Batch(
+                    ids=[str(uuid.uuid4()) for _ in payloads],   # valid unique UUIDs for Qdrant
+                    vectors=embeddings.astype(np.float32).tolist(),
+                    payloads=payloads
                 )
-                points.append(point)
                 
                 # Insert batch
-                if len(points) >= batch_size:
-                    self.qdrant_client.upsert(
-                        collection_name=self.collection_name,
-                        points=points
-                    )
-                    self.successful_inserts += len(points)
-                    print(f"Inserted batch of {len(points)} POIs (Total: {self.successful_inserts})")
-                    points = []
+                self.qdrant_client.upsert(
+                    collection_name=self.collection_name,
+                    points=points
+                )
+                self.successful_inserts += len(payloads)
+                print(f"Inserted batch of {len(payloads)} POIs (Total: {self.successful_inserts})")
                 
             except Exception as e:
-                print(f"Error processing POI {poi.get('name', 'Unknown')}: {e}")
+                print(f"Error inserting batch starting at POI {start}: {e}")
                 continue
-        
-        # Insert remaining points
-        if points:
-            self.qdrant_client.upsert(
+
+    def bulk_insert_pois(self, pois: List[Dict], batch_size: int = 64):
+        """Insert many POIs with HNSW graph building deferred until the upload finishes"""
+        # m=0 disables the HNSW graph while uploading; restoring m=16 builds it in one pass
+        self.qdrant_client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=models.HnswConfigDiff(m=0)
+        )
+        try:
+            self.batch_insert_pois(pois, batch_size)
+        finally:
+            self.qdrant_client.update_collection(
                 collection_name=self.collection_name,
-                points=points
+                hnsw_config=models.HnswConfigDiff(m=16)
             )
-            self.successful_inserts += len(points)
-            print(f"Inserted final batch of {len(points)} POIs")
 
     async def seed_cities(self, cities: List[str]) -> None:
         """Seed Qdrant with POIs from multiple cities"""
@@ -265,7 +332,7 @@ class POISeeder:
         
         if all_pois:
             print(f"\nInserting {len(all_pois)} POIs into Qdrant...")
-            self.batch_insert_pois(all_pois)
+            self.bulk_insert_pois(all_pois)
             print(f"Successfully seeded {self.successful_inserts} POIs")
         else:
             print("No POIs to seed")
@@ -18,6 +18,24 @@ class LLMManager:
         self.settings = get_settings()
         self.last_successful_provider = None
         self._lock = asyncio.Lock()
+        # One pooled client for all providers so concurrent agent calls
+        # reuse warm keep-alive connections instead of reconnecting
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared HTTP client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
     async def generate_text(
         self, 
@@ -99,29 +117,30 @@ class LLMManager:
         
         timeout = httpx.Timeout(30.0, connect=5.0)  # Groq is fast
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                f"{self.settings.GROQ_BASE_URL}/chat/completions",
-                headers=headers,
-                json=payload
-            )
+        client = self._get_client()
+        response = await client.post(
+            f"{self.settings.GROQ_BASE_URL}/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        if "choices" in result and len(result["choices"]) > 0:
+            content = result["choices"][0]["message"]["content"]
             
-            response.raise_for_status()
-            result = response.json()
+            # Check if generation was cut off (incomplete)
+            finish_reason = result["choices"][0].get("finish_reason")
+            if finish_reason == "length":
+                logger.warning("⚠️ Groq response was truncated due to length limit")
+                # Return partial content but mark as incomplete
+                return content + "\n[Response truncated - continuing with fallback...]"
             
-            if "choices" in result and len(result["choices"]) > 0:
-                content = result["choices"][0]["message"]["content"]
-                
-                # Check if generation was cut off (incomplete)
-                finish_reason = result["choices"][0].get("finish_reason")
-                if finish_reason == "length":
-                    logger.warning("⚠️ Groq response was truncated due to length limit")
-                    # Return partial content but mark as incomplete
-                    return content + "\n[Response truncated - continuing with fallback...]"
-                
-                return content
-            else:
-                raise Exception("Invalid response format from Groq")
+            return content
+        else:
+            raise Exception("Invalid response format from Groq")
     
     async def _call_gemini(self, prompt: str, system_prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
         """Call Google Gemini API"""
@@ -145,47 +164,42 @@ class LLMManager:
         
         timeout = httpx.Timeout(45.0, connect=5.0)  # Gemini can be slower
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                f"{self.settings.GOOGLE_BASE_URL}/models/{self.settings.GOOGLE_MODEL}:generateContent?key={self.settings.GOOGLE_API_KEY}",
-                json=payload,
-                timeout=timeout
-            )
+        client = self._get_client()
+        response = await client.post(
+            f"{self.settings.GOOGLE_BASE_URL}/models/{self.settings.GOOGLE_MODEL}:generateContent?key={self.settings.GOOGLE_API_KEY}",
+            json=payload,
+            timeout=timeout
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        if "candidates" in result and len(result["candidates"]) > 0:
+            candidate = result["candidates"][0]
             
-            response.raise_for_status()
-            result = response.json()
+            # Check if generation was blocked or incomplete
+            finish_reason = candidate.get("finishReason")
+            if finish_reason in ["SAFETY", "RECITATION"]:
+                raise Exception(f"Gemini blocked generation: {finish_reason}")
+            elif finish_reason == "MAX_TOKENS":
+                logger.warning("⚠️ Gemini response was truncated due to length limit")
             
-            if "candidates" in result and len(result["candidates"]) > 0:
-                candidate = result["candidates"][0]
-                
-                # Check if generation was blocked or incomplete
-                finish_reason = candidate.get("finishReason")
-                if finish_reason in ["SAFETY", "RECITATION"]:
-                    raise Exception(f"Gemini blocked generation: {finish_reason}")
-                elif finish_reason == "MAX_TOKENS":
-                    logger.warning("⚠️ Gemini response was truncated due to length limit")
-                
-                if "content" in candidate and "parts" in candidate["content"]:
-                    content = candidate["content"]["parts"][0]["text"]
-                    return content
-                else:
-                    raise Exception("Invalid content structure from Gemini")
+            if "content" in candidate and "parts" in candidate["content"]:
+                content = candidate["content"]["parts"][0]["text"]
+                return content
             else:
-                raise Exception("No candidates in Gemini response")
+                raise Exception("Invalid content structure from Gemini")
+        else:
+            raise Exception("No candidates in Gemini response")
     
     async def _call_ollama(self, prompt: str, system_prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
         """Call local Ollama API"""
         try:
-            # Quick health check
-            async with httpx.AsyncClient(timeout=3.0) as client:
-                health = await client.get(f"{self.settings.OLLAMA_BASE_URL}/api/tags")
-                if health.status_code != 200:
-                    raise Exception("Ollama service not available")
-            
             payload = {
                 "model": self.settings.OLLAMA_MODEL,
                 "prompt": prompt,
                 "stream": False,
+                "keep_alive": self.settings.OLLAMA_KEEP_ALIVE,
                 "options": {
                     "num_predict": max_tokens,
                     "temperature": temperature,
@@ -196,22 +210,24 @@ class LLMManager:
             if system_prompt:
                 payload["system"] = system_prompt
             
-            timeout = httpx.Timeout(120.0, connect=10.0)  # Ollama can be slow
+            # No separate health probe: a short connect timeout fails fast
+            # when Ollama is down without an extra round trip per call
+            timeout = httpx.Timeout(120.0, connect=3.0)  # Ollama can be slow
             
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"{self.settings.OLLAMA_BASE_URL}/api/generate",
-                    json=payload,
-                    timeout=timeout
-                )
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                if "response" in result:
-                    return result["response"]
-                else:
-                    raise Exception("Invalid response from Ollama")
+            client = self._get_client()
+            response = await client.post(
+                f"{self.settings.OLLAMA_BASE_URL}/api/generate",
+                json=payload,
+                timeout=timeout
+            )
+            
+            response.raise_for_status()
+            result = response.json()
+            
+            if "response" in result:
+                return result["response"]
+            else:
+                raise Exception("Invalid response from Ollama")
                     
         except httpx.ConnectError:
             raise Exception("Cannot connect to Ollama - ensure it's running")
@@ -2,43 +2,69 @@
 Updated services/multimodal_service.py - Free speech recognition
 """
 from typing import List, Dict, Any
+import asyncio
 from tools.embedding_tool import EmbeddingTool
 import base64
 import json
 import httpx
-import whisper  # Free OpenAI Whisper model
-import tempfile
-import os
+import io
+import threading
+import torch
+from faster_whisper import WhisperModel  # Free Whisper weights on CTranslate2
+
+# Whisper weights are loaded on first use and shared by every service instance
+_WHISPER_MODEL = None
+_WHISPER_LOCK = threading.Lock()  # first transcriptions may arrive on several worker threads
+
+def _get_whisper_model() -> WhisperModel:
+    """Load the shared Whisper model once, on first transcription"""
+    global _WHISPER_MODEL
+    if _WHISPER_MODEL is not None:
+        return _WHISPER_MODEL
+    with _WHISPER_LOCK:
+        if _WHISPER_MODEL is not None:
+            return _WHISPER_MODEL
+        if torch.cuda.is_available():
+            _WHISPER_MODEL = WhisperModel("base", device="cuda", compute_type="float16")
+        else:
+            # int8 weights with CTranslate2's CPU kernels
+            _WHISPER_MODEL = WhisperModel("base", device="cpu", compute_type="int8")
+    return _WHISPER_MODEL
 
 class MultimodalService:
     def __init__(self):
         self.embedding_tool = EmbeddingTool()
-        # Load free Whisper model for speech recognition
-        self.whisper_model = whisper.load_model("base")  # Free model
+        
+    @property
+    def whisper_model(self):
+        """Shared Whisper model for speech recognition"""
+        return _get_whisper_model()
         
     async def analyze_images(self, image_data_list: List[str]) -> Dict[str, Any]:
         """Analyze images using free models"""
         return await self.embedding_tool.analyze_moodboard(image_data_list)
     
     async def transcribe_voice(self, audio_data: str) -> str:
-        """Transcribe voice using free Whisper model"""
+        """Transcribe base64-encoded voice using free Whisper model"""
         try:
             # Decode base64 audio
             audio_bytes = base64.b64decode(audio_data)
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                temp_file.write(audio_bytes)
-                temp_path = temp_file.name
-            
-            # Transcribe using Whisper
-            result = self.whisper_model.transcribe(temp_path)
-            
-            # Clean up temp file
-            os.unlink(temp_path)
-            
-            return result["text"]
+        except Exception:
+            return "Voice transcription temporarily unavailable"
+        return await self.transcribe_audio_bytes(audio_bytes)
+    
+    async def transcribe_audio_bytes(self, audio_bytes: bytes) -> str:
+        """Transcribe raw audio bytes (e.g. an uploaded file) without a base64 round trip"""
+        try:
+            # Whisper decoding is blocking; keep it off the event loop
+            return await asyncio.to_thread(self._transcribe_sync, audio_bytes)
             
         except Exception as e:
             # Fallback response
-            return "Voice transcription temporarily unavailable"
\ No newline at end of file
+            return "Voice transcription temporarily unavailable"
+    
+    def _transcribe_sync(self, audio_bytes: bytes) -> str:
+        """Run Whisper on audio bytes (called in a worker thread)"""
+        # faster-whisper decodes straight from memory, no temp file needed
+        segments, _ = self.whisper_model.transcribe(io.BytesIO(audio_bytes))
+        return "".join(segment.text for segment in segments)
\ No newline at end of file
@@ -1,15 +1,24 @@
 """
 services/realtime_service.py - Real-time Updates Service
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set, Tuple
 from models.travel_response import TravelPlanResponse, RealtimeUpdate
 from datetime import datetime
 import asyncio
+import heapq
+import time
 
 class RealtimeService:
     def __init__(self):
         self.monitored_trips = {}
         self.event_handlers = {}
+        self.check_interval = 1800  # 30 minutes between checks per trip
+        
+        # Single scheduler task driven by a min-heap of (next_check_time, trip_id)
+        self._schedule: List[Tuple[float, str]] = []
+        self._scheduled_trips: Set[str] = set()
+        self._wake = asyncio.Event()
+        self._scheduler_task: Optional[asyncio.Task] = None
         
     async def setup_monitoring(self, trip_id: str, travel_plan: TravelPlanResponse):
         """Setup real-time monitoring for a trip"""
@@ -19,28 +28,64 @@ class RealtimeService:
             "last_update": datetime.now()
         }
         
-        # Start monitoring task
-        asyncio.create_task(self._monitor_trip(trip_id))
+        # Schedule an immediate first check
+        if trip_id not in self._scheduled_trips:
+            self._scheduled_trips.add(trip_id)
+            heapq.heappush(self._schedule, (time.monotonic(), trip_id))
+        
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
+        self._wake.set()
+    
+    async def _run_scheduler(self):
+        """Wake at the earliest due check and run all due trips concurrently"""
+        while True:
+            if not self._schedule:
+                await self._wake.wait()
+            else:
+                delay = self._schedule[0][0] - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            self._wake.clear()
+            
+            now = time.monotonic()
+            due = []
+            while self._schedule and self._schedule[0][0] <= now:
+                _, trip_id = heapq.heappop(self._schedule)
+                # Trips removed from monitoring simply drop out of the schedule
+                if trip_id in self.monitored_trips:
+                    due.append(trip_id)
+                else:
+                    self._scheduled_trips.discard(trip_id)
+            
+            if not due:
+                continue
+            
+            results = await asyncio.gather(
+                *(self._monitor_trip(trip_id) for trip_id in due),
+                return_exceptions=True
+            )
+            for trip_id, result in zip(due, results):
+                if isinstance(result, Exception):
+                    # Stop monitoring a trip whose checks fail
+                    print(f"Error monitoring trip {trip_id}: {result}")
+                    self._scheduled_trips.discard(trip_id)
+                else:
+                    heapq.heappush(self._schedule, (now + self.check_interval, trip_id))
     
     async def _monitor_trip(self, trip_id: str):
-        """Monitor trip for real-time updates"""
-        while trip_id in self.monitored_trips:
-            try:
-                # Check for weather updates
-                await self._check_weather_updates(trip_id)
-                
-                # Check for transportation delays
-                await self._check_transport_delays(trip_id)
-                
-                # Check for venue closures
-                await self._check_venue_status(trip_id)
-                
-                # Sleep for 30 minutes before next check
-                await asyncio.sleep(1800)
-                
-            except Exception as e:
-                print(f"Error monitoring trip {trip_id}: {e}")
-                break
+        """Run one round of real-time checks for a trip"""
+        # Check for weather updates
+        await self._check_weather_updates(trip_id)
+        
+        # Check for transportation delays
+        await self._check_transport_delays(trip_id)
+        
+        # Check for venue closures
+        await self._check_venue_status(trip_id)
     
     async def _check_weather_updates(self, trip_id: str):
         """Check for weather changes that might affect plans"""
@@ -83,4 +128,14 @@ class RealtimeService:
             "status": "replanning_triggered",
             "estimated_completion": "10 minutes",
             "affected_activities": []
-        }
\ No newline at end of file
+        }
+
+# Shared service instance
+_SERVICE: Optional[RealtimeService] = None
+
+def get_realtime_service() -> RealtimeService:
+    """Get the shared realtime service, creating it on first use"""
+    global _SERVICE
+    if _SERVICE is None:
+        _SERVICE = RealtimeService()
+    return _SERVICE
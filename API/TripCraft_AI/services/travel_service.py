@@ -13,7 +13,7 @@ from agents.audio_tour_agent import AudioTourAgent
 from agents.multimodal_agent import MultimodalAgent
 from services.multimodal_service import MultimodalService
 from services.safety_service import SafetyService
-from services.realtime_service import RealtimeService
+from services.realtime_service import get_realtime_service
 from models.travel_request import MultimodalInput, InputType
 import uuid
 from datetime import datetime, date, timedelta
@@ -41,7 +41,7 @@ class TravelPlanningService:
             self.safety_service = None
             
         try:
-            self.realtime_service = RealtimeService()
+            self.realtime_service = get_realtime_service()
         except Exception as e:
             print(f"Warning: Realtime service initialization failed: {e}")
             self.realtime_service = None
@@ -60,7 +60,7 @@ class TravelPlanningService:
         
     async def create_travel_plan(self, request: TravelPlanningRequest) -> TravelPlanResponse:
         """Create comprehensive travel plan with fallback handling"""
-        trip_id = str(uuid.uuid4())
+        trip_id = uuid.uuid4().hex
         
         try:
             # Process multimodal inputs first if service is available
@@ -345,6 +345,9 @@ class TravelPlanningService:
         
         duration = getattr(request, 'duration_days', 1)
         
+        # Same location for every block of every day: validate it once
+        destination = LocationInfo(name=str(request.destination), type="city")
+        
         for day in range(duration):
             current_date = start_date + timedelta(days=day)
             
@@ -356,7 +359,7 @@ class TravelPlanningService:
                         start_time="09:00",
                         end_time="12:00",
                         activity="Morning Exploration",
-                        location=LocationInfo(name=str(request.destination), type="city"),
+                        location=destination,
                         description="Explore morning attractions and activities",
                         cost=50.0,
                         booking_required=False,
@@ -368,7 +371,7 @@ class TravelPlanningService:
                         start_time="14:00",
                         end_time="17:00", 
                         activity="Afternoon Adventures",
-                        location=LocationInfo(name=str(request.destination), type="city"),
+                        location=destination,
                         description="Afternoon sightseeing and experiences",
                         cost=75.0,
                         booking_required=False,
@@ -380,7 +383,7 @@ class TravelPlanningService:
                         start_time="19:00",
                         end_time="22:00",
                         activity="Evening Dining",
-                        location=LocationInfo(name=str(request.destination), type="city"),
+                        location=destination,
                         description="Local dining experience",
                         cost=60.0,
                         booking_required=True,
@@ -393,8 +396,6 @@ class TravelPlanningService:
             daily_plans.append(plan)
         
         return daily_plans
-        
-        return daily_plans
     
     def _extract_transport_options(self, transport_data: Dict[str, Any]) -> List[TransportOption]:
         """Extract transport options from agent results"""
@@ -7,19 +7,36 @@ Uses free DuckDuckGo search and optional web scraping.
 
 import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from urllib.parse import urlparse, urljoin
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, asdict
+from urllib.parse import urlparse, urljoin, quote
 import re
+import random
+import threading
 import hashlib
 from datetime import datetime
 import os
 from pathlib import Path
+from collections import OrderedDict
+import numpy as np
+import orjson
 
 # Free search libraries
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
 from bs4 import BeautifulSoup
 from sentence_transformers import SentenceTransformer
+import torch
+
+from config.settings import get_settings
+from tools.embedding_tool import load_sentence_transformer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Precompiled patterns for snippet cleaning
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
 
 @dataclass
 class Citation:
@@ -30,12 +47,51 @@ class Citation:
     retrieved_at: str
     domain: str
     
+class EmbeddingLRUCache:
+    """Fixed-size LRU cache of text embeddings stored as float16 rows in one preallocated matrix"""
+    
+    def __init__(self, capacity: int = 4096, dim: int = 384):
+        self.capacity = capacity
+        # Process-private rows (~3 MB at the defaults) so workers never overwrite each other's entries
+        self._matrix = np.empty((capacity, dim), dtype=np.float16)
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        # Encoding runs in worker threads, so lookups and inserts can race
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                return None
+            self._index.move_to_end(key)
+            return self._matrix[row].astype(np.float32)
+    
+    def put(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            if key in self._index:
+                row = self._index[key]
+                self._index.move_to_end(key)
+            elif len(self._index) < self.capacity:
+                row = len(self._index)
+            else:
+                # Reuse the least recently used row
+                _, row = self._index.popitem(last=False)
+            self._matrix[row] = embedding
+            self._index[key] = row
+
 class FactVerificationService:
+    # Shared across instances so the model is only loaded once per process
+    _model: Optional[SentenceTransformer] = None
+    _embedding_cache: Optional[EmbeddingLRUCache] = None
+
     def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = self._get_model()
         self.cache_dir = Path("data/verification_cache")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        if FactVerificationService._embedding_cache is None:
+            FactVerificationService._embedding_cache = EmbeddingLRUCache()
+        
         # Trusted domains for higher confidence
         self.trusted_domains = {
             'wikipedia.org': 0.9,
@@ -48,9 +104,37 @@ class FactVerificationService:
             'tripadvisor.com': 0.6
         }
         
-        # Rate limiting
-        self.last_search_time = 0
-        self.search_delay = 1.0  # 1 second between searches
+        # Rate limiting: bounded concurrent searches with a little jitter
+        self._search_semaphore = asyncio.Semaphore(4)
+        self.search_jitter = 0.5  # Max random delay before each search (seconds)
+        
+        # Rate-limit retries: exponential backoff, rotating DDG backends between attempts
+        self.search_max_attempts = 4
+        self.search_backends = ['api', 'html', 'lite']
+        self.search_proxy = get_settings().DDG_PROXY
+        
+        # Pooled HTTP client for the Wikipedia fallback tier (created on first use)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # Verifications currently running, so concurrent callers share one search
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+    
+    @classmethod
+    def _get_model(cls) -> SentenceTransformer:
+        """Lazily load the embedding model on first use"""
+        if cls._model is None:
+            cls._model = load_sentence_transformer('all-MiniLM-L6-v2', device=cls._select_device())
+            cls._model.eval()
+        return cls._model
+    
+    @staticmethod
+    def _select_device() -> str:
+        """Prefer CUDA, then Apple MPS, otherwise CPU"""
+        if torch.cuda.is_available():
+            return 'cuda'
+        if torch.backends.mps.is_available():
+            return 'mps'
+        return 'cpu'
     
     async def verify_claims(self, claims: List[str], top_k: int = 3) -> List[List[Citation]]:
         """
@@ -63,17 +147,21 @@ class FactVerificationService:
         Returns:
             List of citation lists (one list per claim)
         """
-        results = []
+        # Claims are independent; the search semaphore bounds concurrency
+        results = await asyncio.gather(
+            *(self.verify_single_claim(claim, top_k) for claim in claims),
+            return_exceptions=True
+        )
         
-        for claim in claims:
-            try:
-                citations = await self.verify_single_claim(claim, top_k)
-                results.append(citations)
-            except Exception as e:
-                print(f"Error verifying claim '{claim}': {e}")
-                results.append([])
+        citations_per_claim = []
+        for claim, result in zip(claims, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error verifying claim '{claim}': {result}")
+                citations_per_claim.append([])
+            else:
+                citations_per_claim.append(result)
         
-        return results
+        return citations_per_claim
     
     async def verify_single_claim(self, claim: str, top_k: int = 3) -> List[Citation]:
         """Verify a single claim and return citations"""
@@ -84,19 +172,45 @@ class FactVerificationService:
         if cached_citations:
             return cached_citations[:top_k]
         
-        # Search for supporting evidence
+        # Join an identical verification that is already in flight
+        inflight_key = (cache_key, top_k)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._verify_uncached(claim, cache_key, top_k))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        
+        # Shield so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(task)
+    
+    async def _verify_uncached(self, claim: str, cache_key: str, top_k: int) -> List[Citation]:
+        """Search, score and cache citations for a claim"""
+        
+        # Search for supporting evidence, falling back to Wikipedia if DuckDuckGo fails
         search_results = await self._search_claim(claim)
+        if not search_results:
+            search_results = await self._search_wikipedia(claim, limit=top_k * 2)
+        
+        # Skip unusable results up front rather than via the exception path
+        candidates = [
+            result for result in search_results[:top_k * 2]  # Get extra to filter
+            if result.get('url') and (result.get('snippet') or result.get('body'))
+        ]
+        
+        # The claim is tokenized once and embedded together with all snippets in one batch
+        claim_ids = self._token_ids(claim)
+        # Encoding is blocking; run it off the event loop so concurrent claims don't stall it
+        similarities = await asyncio.to_thread(
+            self._semantic_similarities,
+            claim, [result.get('snippet') or result.get('body') for result in candidates]
+        )
         
         # Process and score results
         citations = []
-        for result in search_results[:top_k * 2]:  # Get extra to filter
-            try:
-                citation = await self._process_search_result(result, claim)
-                if citation and citation.confidence_score > 0.3:  # Minimum confidence
-                    citations.append(citation)
-            except Exception as e:
-                print(f"Error processing search result: {e}")
-                continue
+        for result, similarity in zip(candidates, similarities):
+            citation = await self._process_search_result(result, claim, claim_ids, similarity)
+            if citation and citation.confidence_score > 0.3:  # Minimum confidence
+                citations.append(citation)
         
         # Sort by confidence and take top_k
         citations.sort(key=lambda x: x.confidence_score, reverse=True)
@@ -110,30 +224,89 @@ class FactVerificationService:
     async def _search_claim(self, claim: str) -> List[Dict[str, Any]]:
         """Search for information about a claim using DuckDuckGo"""
         
-        # Rate limiting
-        current_time = asyncio.get_event_loop().time()
-        if current_time - self.last_search_time < self.search_delay:
-            await asyncio.sleep(self.search_delay - (current_time - self.last_search_time))
-        self.last_search_time = current_time
+        async with self._search_semaphore:
+            # Jitter spreads out bursts of searches
+            await asyncio.sleep(random.uniform(0, self.search_jitter))
+            
+            for attempt in range(self.search_max_attempts):
+                backend = self.search_backends[attempt % len(self.search_backends)]
+                try:
+                    # Use DuckDuckGo search (free); DDGS is blocking, so keep it off the event loop
+                    raw_results = await asyncio.to_thread(
+                        self._ddg_text_search, claim, backend, self.search_proxy
+                    )
+                    return [
+                        {
+                            'title': result.get('title', ''),
+                            'snippet': result.get('body', ''),
+                            'url': result.get('href', ''),
+                            'source': 'duckduckgo'
+                        }
+                        for result in raw_results
+                    ]
+                    
+                except RatelimitException as e:
+                    if attempt == self.search_max_attempts - 1:
+                        # Out of attempts: fall through to the fallback tier without waiting
+                        break
+                    delay = min(30, 2 ** attempt + random.random())
+                    logger.warning(f"Search rate-limited ({backend} backend), retrying in {delay:.1f}s: {e}")
+                    await asyncio.sleep(delay)
+                    
+                except Exception as e:
+                    logger.warning(f"Search error: {e}")
+                    return []
+            
+            logger.warning(f"Search gave up after {self.search_max_attempts} rate-limited attempts")
+            return []
+    
+    async def _search_wikipedia(self, claim: str, limit: int = 6) -> List[Dict[str, Any]]:
+        """Search Wikipedia's REST API directly, used when DuckDuckGo fails or is rate-limited"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=5.0,
+                limits=httpx.Limits(max_keepalive_connections=20),
+                headers={'User-Agent': 'TripCraftAI/1.0 (travel fact verification)'}
+            )
         
         try:
-            # Use DuckDuckGo search (free)
-            with DDGS() as ddgs:
-                results = []
-                for result in ddgs.text(claim, max_results=10):
-                    results.append({
-                        'title': result.get('title', ''),
-                        'snippet': result.get('body', ''),
-                        'url': result.get('href', ''),
-                        'source': 'duckduckgo'
-                    })
-                return results
-                
+            response = await self._http_client.get(
+                'https://en.wikipedia.org/w/rest.php/v1/search/page',
+                params={'q': claim, 'limit': limit}
+            )
+            response.raise_for_status()
+            return [
+                {
+                    'title': page.get('title', ''),
+                    # Excerpts wrap matched words in <span class="searchmatch"> markup
+                    'snippet': _TAG_RE.sub('', page.get('excerpt') or page.get('description') or ''),
+                    'url': f"https://en.wikipedia.org/wiki/{quote(page.get('key', ''))}",
+                    'source': 'wikipedia'
+                }
+                for page in response.json().get('pages', [])
+                if page.get('key')
+            ]
         except Exception as e:
-            print(f"Search error: {e}")
+            logger.warning(f"Wikipedia search error: {e}")
             return []
     
-    async def _process_search_result(self, result: Dict[str, Any], original_claim: str) -> Optional[Citation]:
+    async def aclose(self):
+        """Close the Wikipedia HTTP client"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    @staticmethod
+    def _ddg_text_search(query: str, backend: str, proxy: Optional[str] = None,
+                         max_results: int = 10) -> List[Dict[str, Any]]:
+        """Blocking DuckDuckGo text search, run in a worker thread"""
+        with DDGS(proxy=proxy) as ddgs:
+            return list(ddgs.text(query, max_results=max_results, backend=backend))
+    
+    async def _process_search_result(self, result: Dict[str, Any], original_claim: str,
+                                     claim_ids: Optional[np.ndarray] = None,
+                                     similarity: Optional[float] = None) -> Optional[Citation]:
         """Process a search result into a citation with confidence score"""
         
         try:
@@ -148,7 +321,7 @@ class FactVerificationService:
             domain = urlparse(url).netloc.lower()
             
             # Calculate confidence score
-            confidence = self._calculate_confidence(snippet, original_claim, domain)
+            confidence = self._calculate_confidence(snippet, original_claim, domain, claim_ids, similarity)
             
             # Clean snippet
             clean_snippet = self._clean_snippet(snippet)
@@ -162,36 +335,32 @@ class FactVerificationService:
                 domain=domain
             )
             
-        except Exception as e:
-            print(f"Error processing result: {e}")
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Error processing result: {e}")
             return None
     
-    def _calculate_confidence(self, snippet: str, claim: str, domain: str) -> float:
+    def _calculate_confidence(self, snippet: str, claim: str, domain: str,
+                              claim_ids: Optional[np.ndarray] = None,
+                              similarity: Optional[float] = None) -> float:
         """Calculate confidence score for a citation"""
         
         # Base confidence from domain trustworthiness
-        domain_confidence = 0.5  # Default
-        for trusted_domain, confidence in self.trusted_domains.items():
-            if trusted_domain in domain:
-                domain_confidence = confidence
-                break
+        domain_confidence = self._get_domain_trust(domain)
         
-        # Semantic similarity between claim and snippet
-        try:
-            claim_embedding = self.embedding_model.encode([claim])
-            snippet_embedding = self.embedding_model.encode([snippet])
-            
-            # Cosine similarity
-            similarity = float(claim_embedding @ snippet_embedding.T)
-            semantic_score = max(0, similarity)  # Ensure non-negative
-            
-        except Exception:
+        # Semantic similarity between claim and snippet (precomputed when batch-scoring)
+        if similarity is None:
+            similarity = self._semantic_similarities(claim, [snippet])[0]
+        if similarity is None:
             semantic_score = 0.3  # Default if embedding fails
+        else:
+            semantic_score = max(0.0, float(similarity))  # Ensure non-negative
         
         # Text overlap score
-        claim_words = set(claim.lower().split())
-        snippet_words = set(snippet.lower().split())
-        overlap_ratio = len(claim_words & snippet_words) / len(claim_words) if claim_words else 0
+        if claim_ids is None:
+            claim_ids = self._token_ids(claim)
+        snippet_ids = self._token_ids(snippet)
+        overlap = np.intersect1d(claim_ids, snippet_ids, assume_unique=True).size
+        overlap_ratio = overlap / claim_ids.size if claim_ids.size else 0
         
         # Combined confidence score
         confidence = (
@@ -202,13 +371,61 @@ class FactVerificationService:
         
         return min(1.0, max(0.0, confidence))
     
+    @staticmethod
+    def _token_ids(text: str) -> np.ndarray:
+        """Unique lower-cased word tokens as int64 hash ids (no growing vocab to manage)"""
+        return np.unique(np.fromiter((hash(w) for w in text.lower().split()), dtype=np.int64))
+    
+    def _semantic_similarities(self, claim: str, snippets: List[str]) -> List[Optional[float]]:
+        """Cosine similarity of each snippet to the claim, or None if embedding fails"""
+        try:
+            embeddings = self._encode_batch([claim] + snippets)
+        except Exception as e:
+            logger.warning(f"Embedding error: {e}")
+            return [None] * len(snippets)
+        
+        # Embeddings are L2-normalized, so one matrix-vector product gives all cosines
+        return (embeddings[1:] @ embeddings[0]).tolist()
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode texts as normalized float32 rows, reusing recently computed embeddings"""
+        keys = [self._get_cache_key(text) for text in texts]
+        embeddings: List[Optional[np.ndarray]] = [self._embedding_cache.get(key) for key in keys]
+        
+        # Tokenize and encode each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(keys[i], []).append(i)
+        
+        if missing:
+            encoded = self.embedding_model.encode(
+                [texts[positions[0]] for positions in missing.values()],
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for (key, positions), embedding in zip(missing.items(), encoded):
+                self._embedding_cache.put(key, embedding)
+                for i in positions:
+                    embeddings[i] = embedding
+        
+        return np.vstack(embeddings).astype(np.float32, copy=False)
+    
+    def _get_domain_trust(self, domain: str, default: float = 0.5) -> float:
+        """Look up domain trust by registered domain (e.g. wikipedia.org), then by TLD (e.g. gov)"""
+        labels = domain.split(':', 1)[0].rsplit('.', 2)
+        registered_domain = '.'.join(labels[-2:])
+        if registered_domain in self.trusted_domains:
+            return self.trusted_domains[registered_domain]
+        return self.trusted_domains.get(labels[-1], default)
+    
     def _clean_snippet(self, snippet: str) -> str:
         """Clean and truncate snippet text"""
         # Remove HTML tags if any
-        clean_text = re.sub(r'<[^>]+>', '', snippet)
+        clean_text = _TAG_RE.sub('', snippet)
         
         # Remove extra whitespace
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        clean_text = _WS_RE.sub(' ', clean_text).strip()
         
         # Truncate to reasonable length
         if len(clean_text) > 300:
@@ -218,7 +435,7 @@ class FactVerificationService:
     
     def _get_cache_key(self, claim: str) -> str:
         """Generate cache key for a claim"""
-        return hashlib.md5(claim.encode()).hexdigest()
+        return hashlib.blake2b(claim.encode(), digest_size=16).hexdigest()
     
     def _load_from_cache(self, cache_key: str) -> Optional[List[Citation]]:
         """Load citations from cache"""
@@ -228,12 +445,10 @@ class FactVerificationService:
             if cache_file.exists():
                 # Check if cache is recent (24 hours)
                 if datetime.now().timestamp() - cache_file.stat().st_mtime < 86400:
-                    import json
-                    with open(cache_file, 'r') as f:
-                        data = json.load(f)
-                        return [Citation(**item) for item in data]
+                    data = orjson.loads(cache_file.read_bytes())
+                    return [Citation(**item) for item in data]
         except Exception as e:
-            print(f"Cache load error: {e}")
+            logger.warning(f"Cache load error: {e}")
         
         return None
     
@@ -242,18 +457,12 @@ class FactVerificationService:
         cache_file = self.cache_dir / f"{cache_key}.json"
         
         try:
-            import json
-            with open(cache_file, 'w') as f:
-                json.dump([{
-                    'url': c.url,
-                    'title': c.title,
-                    'snippet': c.snippet,
-                    'confidence_score': c.confidence_score,
-                    'retrieved_at': c.retrieved_at,
-                    'domain': c.domain
-                } for c in citations], f, indent=2)
+            # Write to a temp file and swap it in so readers never see a partial entry
+            tmp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.tmp")
+            tmp_file.write_bytes(orjson.dumps([asdict(c) for c in citations]))
+            os.replace(tmp_file, cache_file)
         except Exception as e:
-            print(f"Cache save error: {e}")
+            logger.warning(f"Cache save error: {e}")
     
     async def verify_poi_info(self, poi_name: str, city: str = "") -> Dict[str, Any]:
         """Verify information about a specific point of interest"""
@@ -297,16 +506,29 @@ class FactVerificationService:
         
         return citation_text
 
+# Shared service instance
+_SERVICE: Optional[FactVerificationService] = None
+
+def get_service() -> FactVerificationService:
+    """Get the shared fact verification service, creating it on first use"""
+    global _SERVICE
+    if _SERVICE is None:
+        _SERVICE = FactVerificationService()
+    return _SERVICE
+
+async def close_service():
+    """Close the shared service's HTTP client, if the service was ever created"""
+    if _SERVICE is not None:
+        await _SERVICE.aclose()
+
 # Convenience functions
 async def verify_travel_claim(claim: str, top_k: int = 3) -> List[Citation]:
     """Verify a travel-related claim"""
-    service = FactVerificationService()
-    return await service.verify_single_claim(claim, top_k)
+    return await get_service().verify_single_claim(claim, top_k)
 
 async def verify_poi_facts(poi_name: str, city: str = "") -> Dict[str, Any]:
     """Verify facts about a point of interest"""
-    service = FactVerificationService()
-    return await service.verify_poi_info(poi_name, city)
+    return await get_service().verify_poi_info(poi_name, city)
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -5,27 +5,170 @@ from sentence_transformers import SentenceTransformer
 from transformers import pipeline, AutoModel, AutoProcessor
 from PIL import Image
 import torch
+import asyncio
 import base64
 import io
-import httpx
-from typing import List, Union, Dict, Any
+import platform
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from functools import lru_cache
+from typing import List, Union, Dict, Any, Tuple, Optional
 from config.settings import get_settings
+from utils.logger import get_logger
+from utils.http_client import get_http_client
 
-class EmbeddingTool:
-    def __init__(self):
-        self.settings = get_settings()
-        self.text_model = SentenceTransformer(self.settings.EMBEDDING_MODEL)
+logger = get_logger(__name__)
+
+# Ollama embeddings are deterministic per (model, text): keep recent ones in an LRU
+_EMBED_CACHE_SIZE = 4096
+_ollama_embed_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+# Same for the shared local sentence-transformers model, keyed by text
+_local_embed_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
+# ONNX exports of vision models are written here on first use
+_ONNX_CACHE_DIR = Path("data/onnx")
+
+# Moodboard images larger than this are skipped; the classifier only needs ~224px input
+_MAX_IMAGE_BYTES = 8_000_000
+_CLASSIFIER_INPUT_SIZE = (224, 224)
+
+# Models are loaded on first use and shared by every EmbeddingTool instance
+_SHARED_TEXT_MODEL = None
+_SHARED_IMAGE_CLASSIFIER = None
+_TEXT_MODEL_LOCK = threading.Lock()
+_IMAGE_MODEL_ID = "microsoft/resnet-50"  # Free image classification model
+_IMAGE_CLASSIFIER_LOCK = threading.Lock()  # first use can come from several worker threads at once
+
+@lru_cache(maxsize=1)
+def _onnx_embedding_file() -> str:
+    """Pick the int8 ONNX export of a sentence-transformers model that suits this CPU"""
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'onnx/model_qint8_arm64.onnx'
+    try:
+        cpu_flags = Path('/proc/cpuinfo').read_text()
+    except OSError:
+        cpu_flags = ''
+    # The s8s8 VNNI export is only accurate with VNNI; the u8 AVX2 export runs on any modern x86
+    if 'avx512_vnni' in cpu_flags:
+        return 'onnx/model_qint8_avx512_vnni.onnx'
+    return 'onnx/model_quint8_avx2.onnx'
+
+def load_sentence_transformer(model_name: str, device: Optional[str] = None) -> SentenceTransformer:
+    """Load a sentence-transformers model, using an int8 ONNX export on CPU"""
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    if device != 'cpu':
+        return SentenceTransformer(model_name, device=device)
+    try:
+        # int8 dynamic-quantized ONNX export shipped with the model on the Hub
+        return SentenceTransformer(
+            model_name,
+            backend='onnx',
+            model_kwargs={'file_name': _onnx_embedding_file()}
+        )
+    except Exception as e:
+        logger.warning(f"ONNX embedding backend unavailable, falling back to PyTorch: {e}")
+        return SentenceTransformer(model_name)
+
+def _get_shared_text_model() -> SentenceTransformer:
+    """Load the shared sentence-transformers model once"""
+    global _SHARED_TEXT_MODEL
+    if _SHARED_TEXT_MODEL is not None:
+        return _SHARED_TEXT_MODEL
+    with _TEXT_MODEL_LOCK:
+        if _SHARED_TEXT_MODEL is None:
+            _SHARED_TEXT_MODEL = load_sentence_transformer(get_settings().EMBEDDING_MODEL)
+    return _SHARED_TEXT_MODEL
+
+def _load_onnx_image_classifier(model_id: str):
+    """Build a CPU image-classification pipeline on an ONNX Runtime export of the model"""
+    from optimum.onnxruntime import ORTModelForImageClassification
+    from transformers import AutoImageProcessor
+    
+    # Export once, then reuse the saved graph on later starts
+    onnx_dir = _ONNX_CACHE_DIR / model_id.replace('/', '__')
+    if (onnx_dir / "model.onnx").exists():
+        model = ORTModelForImageClassification.from_pretrained(onnx_dir)
+    else:
+        model = ORTModelForImageClassification.from_pretrained(model_id, export=True)
+        # Save under a per-process name and rename, so concurrent workers never mix files
+        tmp_dir = onnx_dir.with_name(f"{onnx_dir.name}.tmp{os.getpid()}")
+        model.save_pretrained(tmp_dir)
+        try:
+            os.replace(tmp_dir, onnx_dir)
+        except OSError:
+            # Another process finished the export first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    return pipeline(
+        "image-classification",
+        model=model,
+        image_processor=AutoImageProcessor.from_pretrained(model_id)
+    )
+
+def _get_shared_image_classifier():
+    """Load the shared image classification pipeline once"""
+    global _SHARED_IMAGE_CLASSIFIER
+    if _SHARED_IMAGE_CLASSIFIER is not None:
+        return _SHARED_IMAGE_CLASSIFIER
+    with _IMAGE_CLASSIFIER_LOCK:
+        if _SHARED_IMAGE_CLASSIFIER is not None:
+            return _SHARED_IMAGE_CLASSIFIER
+        model_id = _IMAGE_MODEL_ID
+        use_cuda = torch.cuda.is_available()
+        if not use_cuda:
+            try:
+                _SHARED_IMAGE_CLASSIFIER = _load_onnx_image_classifier(model_id)
+                return _SHARED_IMAGE_CLASSIFIER
+            except Exception as e:
+                logger.warning(f"ONNX image classifier unavailable, falling back to PyTorch: {e}")
         
-        # Free image classification model
-        self.image_classifier = pipeline(
+        _SHARED_IMAGE_CLASSIFIER = pipeline(
             "image-classification", 
-            model="microsoft/resnet-50",
-            device=0 if torch.cuda.is_available() else -1
+            model=model_id,
+            device=0 if use_cuda else -1,
+            torch_dtype=torch.float16 if use_cuda else None,
+            model_kwargs={"low_cpu_mem_usage": True}
         )
+    return _SHARED_IMAGE_CLASSIFIER
+
+# Label keywords -> (preference key, value), checked in order
+_LABEL_CONCEPTS = (
+    (('beach', 'ocean', 'water', 'coast'), ('vibes', 'beach')),
+    (('mountain', 'hill', 'landscape'), ('vibes', 'mountain')),
+    (('building', 'architecture', 'city'), ('vibes', 'urban')),
+    (('food', 'restaurant', 'dining'), ('activities', 'culinary')),
+    (('art', 'museum', 'culture'), ('activities', 'cultural')),
+    (('nature', 'park', 'forest'), ('vibes', 'nature')),
+)
+
+@lru_cache(maxsize=1024)
+def _label_to_concept(label: str) -> Optional[Tuple[str, str]]:
+    """Map a classifier label to a travel concept; the label set is fixed, so results are memoized"""
+    for words, concept in _LABEL_CONCEPTS:
+        if any(word in label for word in words):
+            return concept
+    return None
+
+class EmbeddingTool:
+    def __init__(self):
+        self.settings = get_settings()
         
         # Ollama embedding fallback
         self.use_ollama_embed = True
         
+    @property
+    def text_model(self) -> SentenceTransformer:
+        return _get_shared_text_model()
+    
+    @property
+    def image_classifier(self):
+        return _get_shared_image_classifier()
+        
     async def encode_text(self, texts: Union[str, List[str]]) -> List[List[float]]:
         """Generate text embeddings using free models"""
         if isinstance(texts, str):
@@ -40,29 +183,55 @@ class EmbeddingTool:
             return embeddings
         else:
             # Fallback to sentence transformers
-            embeddings = self.text_model.encode(texts)
+            embeddings = await asyncio.to_thread(lambda: _get_shared_text_model().encode(texts))
             return embeddings.tolist()
     
     async def _get_ollama_embedding(self, text: str) -> List[float]:
         """Get embedding from Ollama (completely free)"""
+        key = (self.settings.OLLAMA_EMBED_MODEL, text)
+        cached = _ollama_embed_cache.get(key)
+        if cached is not None:
+            _ollama_embed_cache.move_to_end(key)
+            return list(cached)
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.settings.OLLAMA_BASE_URL}/api/embeddings",
-                    json={
-                        "model": self.settings.OLLAMA_EMBED_MODEL,
-                        "prompt": text
-                    },
-                    timeout=30.0
-                )
-                if response.status_code == 200:
-                    return response.json().get("embedding", [0.0] * 384)
-                else:
-                    # Fallback to sentence transformers
-                    return self.text_model.encode([text])[0].tolist()
+            client = get_http_client()
+            response = await client.post(
+                f"{self.settings.OLLAMA_BASE_URL}/api/embeddings",
+                json={
+                    "model": self.settings.OLLAMA_EMBED_MODEL,
+                    "prompt": text
+                },
+                timeout=30.0
+            )
+            if response.status_code == 200:
+                embedding = response.json().get("embedding")
+                if not embedding:
+                    return [0.0] * 384
+                _ollama_embed_cache[key] = embedding
+                if len(_ollama_embed_cache) > _EMBED_CACHE_SIZE:
+                    _ollama_embed_cache.popitem(last=False)
+                return list(embedding)
+            else:
+                # Fallback to sentence transformers
+                return await self._encode_local(text)
         except Exception:
             # Fallback to sentence transformers
-            return self.text_model.encode([text])[0].tolist()
+            return await self._encode_local(text)
+    
+    async def _encode_local(self, text: str) -> List[float]:
+        """Encode with the local model in a worker thread, off the event loop"""
+        cached = _local_embed_cache.get(text)
+        if cached is not None:
+            _local_embed_cache.move_to_end(text)
+            return list(cached)
+        
+        # Resolve the model in the worker too, so a first-use load never runs on the event loop
+        embedding = (await asyncio.to_thread(lambda: _get_shared_text_model().encode([text])))[0].tolist()
+        _local_embed_cache[text] = embedding
+        if len(_local_embed_cache) > _EMBED_CACHE_SIZE:
+            _local_embed_cache.popitem(last=False)
+        return list(embedding)
     
     async def analyze_moodboard(self, images: List[str]) -> Dict[str, Any]:
         """Analyze moodboard images using free models"""
@@ -77,15 +246,11 @@ class EmbeddingTool:
         total_confidence = 0
         processed_images = 0
         
-        for img_base64 in images:
+        # Decoding and inference are blocking; run them off the event loop
+        batch_results = await asyncio.to_thread(self._decode_and_classify, images)
+        
+        for results in batch_results:
             try:
-                # Decode image
-                img_data = base64.b64decode(img_base64)
-                image = Image.open(io.BytesIO(img_data))
-                
-                # Classify image using free model
-                results = self.image_classifier(image)
-                
                 processed_images += 1
                 
                 # Map classifications to travel preferences
@@ -96,18 +261,9 @@ class EmbeddingTool:
                     
                     if confidence > 0.2:  # Lower threshold for free model
                         # Map to travel concepts
-                        if any(word in label for word in ['beach', 'ocean', 'water', 'coast']):
-                            travel_preferences['vibes'].append('beach')
-                        elif any(word in label for word in ['mountain', 'hill', 'landscape']):
-                            travel_preferences['vibes'].append('mountain')
-                        elif any(word in label for word in ['building', 'architecture', 'city']):
-                            travel_preferences['vibes'].append('urban')
-                        elif any(word in label for word in ['food', 'restaurant', 'dining']):
-                            travel_preferences['activities'].append('culinary')
-                        elif any(word in label for word in ['art', 'museum', 'culture']):
-                            travel_preferences['activities'].append('cultural')
-                        elif any(word in label for word in ['nature', 'park', 'forest']):
-                            travel_preferences['vibes'].append('nature')
+                        concept = _label_to_concept(label)
+                        if concept is not None:
+                            travel_preferences[concept[0]].append(concept[1])
                             
             except Exception as e:
                 continue
@@ -120,4 +276,38 @@ class EmbeddingTool:
         travel_preferences['vibes'] = list(set(travel_preferences['vibes']))
         travel_preferences['activities'] = list(set(travel_preferences['activities']))
         
-        return travel_preferences
\ No newline at end of file
+        return travel_preferences
+    
+    def _decode_and_classify(self, images: List[str]) -> List[List[Dict[str, Any]]]:
+        """Decode base64 images and classify them (called in a worker thread)"""
+        # Decode every image first so the classifier sees a single batch
+        decoded = []
+        for img_base64 in images:
+            try:
+                # Reject oversized payloads before decoding (base64 is ~4/3 the raw size)
+                if len(img_base64) * 3 // 4 > _MAX_IMAGE_BYTES:
+                    continue
+                img_data = base64.b64decode(img_base64)
+                image = Image.open(io.BytesIO(img_data))
+                # Let JPEGs decode at a reduced scale that still covers the model input
+                image.draft('RGB', _CLASSIFIER_INPUT_SIZE)
+                decoded.append(image.convert('RGB'))
+            except Exception:
+                continue
+        
+        return self._classify_images(decoded)
+    
+    def _classify_images(self, images: List[Image.Image]) -> List[List[Dict[str, Any]]]:
+        """Classify images in one batched pipeline call, per image if the batch fails"""
+        if not images:
+            return []
+        try:
+            return self.image_classifier(images, top_k=3, batch_size=min(len(images), 8))
+        except Exception:
+            results = []
+            for image in images:
+                try:
+                    results.append(self.image_classifier(image, top_k=3))
+                except Exception:
+                    continue
+            return results
\ No newline at end of file
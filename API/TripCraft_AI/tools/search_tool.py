@@ -2,78 +2,135 @@
 tools/search_tool.py - Web Search using simple HTTP requests (No Playwright)
 """
 import asyncio
-from typing import List, Dict, Any, Optional
-import httpx
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from bs4 import BeautifulSoup
 from config.settings import get_settings
 from utils.logger import get_logger
+from utils.http_client import get_http_client
 
 logger = get_logger(__name__)
 
+# Results shared by every SearchTool instance, keyed on (kind, query, num_results)
+_CACHE_TTL = 600.0
+_CACHE_MAXSIZE = 512
+_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, list]]" = OrderedDict()
+
+def _cache_get(key: Tuple[str, str, int]) -> Optional[list]:
+    """Return a fresh cached result, dropping it if expired"""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    stored_at, value = entry
+    if time.monotonic() - stored_at > _CACHE_TTL:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return list(value)
+
+def _cache_put(key: Tuple[str, str, int], value: list):
+    """Store a result, evicting the least recently used entry when full"""
+    _cache[key] = (time.monotonic(), list(value))
+    _cache.move_to_end(key)
+    if len(_cache) > _CACHE_MAXSIZE:
+        _cache.popitem(last=False)
+
 class SearchTool:
     def __init__(self):
         self.settings = get_settings()
         
     async def search_web(self, query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Search web and extract structured information using simple HTTP requests"""
-        search_urls = await self._get_search_urls(query, num_results)
-        results = []
+        key = ("web", query, num_results)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for url in search_urls:
-                try:
-                    response = await client.get(
-                        url,
-                        headers={
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }
-                    )
-                    
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # Extract basic information
-                        title = soup.find('title')
-                        title_text = title.get_text().strip() if title else ""
-                        
-                        # Remove script and style elements
-                        for script in soup(["script", "style"]):
-                            script.decompose()
-                        
-                        # Get text content
-                        text_content = soup.get_text()
-                        lines = (line.strip() for line in text_content.splitlines())
-                        content = ' '.join(line for line in lines if line)[:2000]  # Limit content
-                        
-                        results.append({
-                            "url": url,
-                            "title": title_text,
-                            "content": content,
-                            "raw_html": response.text[:1000] if response.text else ""
-                        })
-                except Exception as e:
-                    logger.warning(f"Failed to fetch {url}: {e}")
-                    continue
-                    
+        results = await self._fetch_results(query, num_results)
+        if results:
+            _cache_put(key, results)
         return results
     
+    async def _fetch_results(self, query: str, num_results: int) -> List[Dict[str, Any]]:
+        """Fetch and parse the pages for a query"""
+        search_urls = await self._get_search_urls(query, num_results)
+        
+        # Fetch each distinct URL once, all pages concurrently
+        unique_urls = list(dict.fromkeys(search_urls))
+        pages = await asyncio.gather(*(self._fetch_page(url) for url in unique_urls))
+        
+        return [page for page in pages if page is not None]
+    
+    async def _fetch_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch one page and extract its title and text"""
+        try:
+            client = get_http_client()
+            response = await client.get(
+                url,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                },
+                timeout=30.0
+            )
+            
+            if response.status_code == 200:
+                # HTML parsing is CPU-bound; keep it off the event loop
+                return await asyncio.to_thread(self._extract_page, url, response.text)
+        except Exception as e:
+            logger.warning(f"Failed to fetch {url}: {e}")
+        return None
+    
+    @staticmethod
+    def _extract_page(url: str, html: str) -> Dict[str, Any]:
+        """Extract title and visible text from a page's HTML"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract basic information
+        title = soup.find('title')
+        title_text = title.get_text().strip() if title else ""
+        
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+        
+        # Get text content
+        text_content = soup.get_text()
+        lines = (line.strip() for line in text_content.splitlines())
+        content = ' '.join(line for line in lines if line)[:2000]  # Limit content
+        
+        return {
+            "url": url,
+            "title": title_text,
+            "content": content,
+            "raw_html": html[:1000] if html else ""
+        }
+    
     async def _get_search_urls(self, query: str, num_results: int) -> List[str]:
         """Get search URLs using DuckDuckGo"""
+        key = ("urls", query, num_results)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
         search_query = f"{query} travel guide attractions restaurants"
         urls = []
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.duckduckgo.com/",
-                    params={"q": search_query, "format": "json", "no_html": "1"}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    for item in data.get("RelatedTopics", [])[:num_results]:
-                        if "FirstURL" in item:
-                            urls.append(item["FirstURL"])
+            client = get_http_client()
+            response = await client.get(
+                f"https://api.duckduckgo.com/",
+                params={"q": search_query, "format": "json", "no_html": "1"},
+                timeout=5.0
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                for item in data.get("RelatedTopics", [])[:num_results]:
+                    if "FirstURL" in item:
+                        urls.append(item["FirstURL"])
+                if urls:
+                    _cache_put(key, urls[:num_results])
                             
         except Exception as e:
             # Fallback URLs for common travel sites
@@ -1,9 +1,10 @@
 """
 tools/vector_store.py - Qdrant Vector Database
 """
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from typing import List, Dict, Any, Optional
+import asyncio
 import uuid
 
 from config.settings import get_settings
@@ -15,35 +16,66 @@ print(settings.OLLAMA_MODEL)  # should print "gemma2:2b" from your .env
 class VectorStore:
     def __init__(self):
         self.settings = get_settings()
-        self.client = QdrantClient(
+        self.client = AsyncQdrantClient(
             url=self.settings.QDRANT_URL,
-            api_key=self.settings.QDRANT_API_KEY
+            api_key=self.settings.QDRANT_API_KEY,
+            prefer_grpc=self.settings.QDRANT_PREFER_GRPC
         )
         self.collection_name = "travel_experiences"
         
+        # Batched upserts: points are flushed every batch_size points or flush_interval seconds
+        self.batch_size = 64
+        self.flush_interval = 0.25
+        self._pending: List[models.PointStruct] = []
+        self._flush_event = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closing = False
+        
     async def initialize(self):
         """Initialize vector store collections"""
         try:
             # Create collection if it doesn't exist
-            collections = self.client.get_collections().collections
+            collections = (await self.client.get_collections()).collections
             if not any(c.name == self.collection_name for c in collections):
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=models.VectorParams(
                         size=384,  # all-MiniLM-L6-v2 embedding size
                         distance=models.Distance.COSINE
+                    ),
+                    # int8 scalar quantization keeps a 4x smaller copy of the vectors in RAM
+                    quantization_config=models.ScalarQuantization(
+                        scalar=models.ScalarQuantizationConfig(
+                            type=models.ScalarType.INT8,
+                            always_ram=True
+                        )
                     )
                 )
         except Exception as e:
             print(f"Error initializing vector store: {e}")
     
+    async def close(self):
+        """Stop the background flusher, write any pending points and close the client"""
+        if self._flush_task is not None:
+            # Let the flusher finish its current upsert and exit, rather than cancelling mid-batch
+            self._closing = True
+            self._flush_event.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+        await self.client.close()
+    
     async def search_experiences(self, query_embedding: List[float], limit: int = 10) -> List[Dict[str, Any]]:
         """Search for similar travel experiences"""
         try:
-            search_result = self.client.search(
+            search_result = await self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_embedding,
-                limit=limit
+                limit=limit,
+                # Search the int8 vectors, then rescore the top candidates with full precision
+                search_params=models.SearchParams(
+                    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+                )
             )
             
             return [
@@ -58,17 +90,53 @@ class VectorStore:
             return []
     
     async def add_experience(self, experience_data: Dict[str, Any], embedding: List[float]):
-        """Add travel experience to vector store"""
+        """Queue travel experience for the next batched upsert"""
+        self._pending.append(
+            models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=embedding,
+                payload=experience_data
+            )
+        )
+        
+        if self._closing:
+            # Shutting down - write through
+            await self.flush()
+        elif self._flush_task is None:
+            # Start the flusher on first use; it exits again once the queue stays empty
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        elif len(self._pending) >= self.batch_size:
+            self._flush_event.set()
+    
+    async def flush(self):
+        """Upsert all pending experiences in a single request"""
+        if not self._pending:
+            return
+        
+        points, self._pending = self._pending, []
         try:
-            self.client.upsert(
+            await self.client.upsert(
                 collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=str(uuid.uuid4()),
-                        vector=embedding,
-                        payload=experience_data
-                    )
-                ]
+                points=points,
+                wait=False
             )
+        except asyncio.CancelledError:
+            # Put the batch back so a later flush can still write it
+            self._pending[:0] = points
+            raise
         except Exception as e:
-            print(f"Error adding experience: {e}")
\ No newline at end of file
+            print(f"Error adding experiences: {e}")
+    
+    async def _flush_loop(self):
+        """Flush pending points when a batch fills up or the flush interval elapses"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+            if not self._pending and not self._closing:
+                # Idle: stop waking up until the next add_experience
+                self._flush_task = None
+                return
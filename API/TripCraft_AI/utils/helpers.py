@@ -3,7 +3,7 @@ utils/helpers.py - Utility Functions
 """
 from typing import Dict, Any, List, Optional
 import re
-import hashlib
+import uuid
 from datetime import datetime, timedelta
 import json
 
@@ -23,8 +23,7 @@ def clean_text(text: str) -> str:
 
 def generate_trip_id(destination: str, start_date: str, user_id: Optional[str] = None) -> str:
     """Generate unique trip identifier"""
-    base_string = f"{destination}_{start_date}_{user_id or 'anonymous'}_{datetime.now().isoformat()}"
-    return hashlib.md5(base_string.encode()).hexdigest()[:12]
+    return uuid.uuid4().hex[:12]
 
 def extract_location_info(location_input: str) -> Dict[str, Any]:
     """Extract structured location information from text"""
@@ -0,0 +1,27 @@
+"""
+utils/http_client.py - Shared HTTP Client
+
+One pooled httpx client for tools that make many short outbound requests,
+so connections (TCP + TLS) are kept alive and reused between calls.
+"""
+from typing import Optional
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+        )
+    return _client
+
+async def close_http_client():
+    """Close the shared HTTP client (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
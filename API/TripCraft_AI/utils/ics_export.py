@@ -2,22 +2,182 @@
 utils/ics_export.py - ICS (calendar) exporter
 
 Generate .ics calendar files from travel itineraries for Google/Apple Calendar import.
-Uses free icalendar library.
+Itineraries are written as RFC 5545 text directly; the free icalendar library is kept
+as a fallback (use_icalendar=True).
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Any, List, Tuple, Sequence, Iterator
 import uuid
 import pytz
 from icalendar import Calendar, Event, vText
 from models.travel_response import TravelPlanResponse, DayPlan, ActivityBlock
 
+_ICS_ESCAPES = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n'})
+
+def _escape(text: str) -> str:
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return str(text).replace('\r\n', '\n').translate(_ICS_ESCAPES)
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets per physical line (RFC 5545 section 3.1)"""
+    if len(line) <= 75 and line.isascii():
+        return line
+    
+    parts = []
+    current = []
+    octets = 0
+    limit = 75
+    for char in line:
+        size = len(char.encode('utf-8'))
+        if octets + size > limit:
+            parts.append(''.join(current))
+            current = []
+            octets = 0
+            limit = 74  # Continuation lines start with a space
+        current.append(char)
+        octets += size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+def _serialize(lines: List[str]) -> bytes:
+    """Fold and CRLF-terminate content lines, encoded as UTF-8"""
+    return "".join(_fold(line) + "\r\n" for line in lines).encode('utf-8')
+
+# Calendar properties that never change between itineraries, serialized once
+_CALENDAR_PREAMBLE = _serialize([
+    "BEGIN:VCALENDAR",
+    "PRODID:-//TripCraft AI//Travel Planner//EN",
+    "VERSION:2.0",
+    "CALSCALE:GREGORIAN",
+    "METHOD:PUBLISH",
+])
+_CALENDAR_END = b"END:VCALENDAR\r\n"
+
 class ICSExporter:
-    def __init__(self, timezone: str = "UTC"):
+    def __init__(self, timezone: str = "UTC", use_icalendar: bool = False):
         self.timezone = pytz.timezone(timezone)
+        self._tz_str = str(self.timezone)
+        self.use_icalendar = use_icalendar
+        
+        # UIDs only need to be unique per calendar: one random prefix plus a counter
+        self._uid_prefix = uuid.uuid4().hex
+        self._uid_counter = 0
+        
+        # Activity times repeat across days; parse and localize each combination once
+        self._time_cache: Dict[str, Tuple[int, int]] = {}
+        self._dt_cache: Dict[Tuple[date, int, int], datetime] = {}
+    
+    def itinerary_to_ics(self, itinerary: TravelPlanResponse) -> bytes:
+        """Convert travel itinerary to ICS calendar format (UTF-8 bytes)"""
+        if self.use_icalendar:
+            return self._itinerary_to_ics_icalendar(itinerary)
+        return b"".join(self.iter_ics(itinerary))
     
-    def itinerary_to_ics(self, itinerary: TravelPlanResponse) -> str:
-        """Convert travel itinerary to ICS calendar format"""
+    def itinerary_to_ics_str(self, itinerary: TravelPlanResponse) -> str:
+        """Convert travel itinerary to ICS calendar format as text"""
+        return self.itinerary_to_ics(itinerary).decode('utf-8')
+    
+    def iter_ics(self, itinerary: TravelPlanResponse) -> Iterator[bytes]:
+        """Yield the calendar as folded ICS bytes, one component at a time"""
+        if self.use_icalendar:
+            yield self._itinerary_to_ics_icalendar(itinerary)
+            return
+        
+        yield _CALENDAR_PREAMBLE
+        yield _serialize([
+            f"X-WR-CALNAME:{_escape(f'Trip to {itinerary.destination_info.name}')}",
+            f"X-WR-CALDESC:{_escape(itinerary.summary)}",
+            f"X-WR-TIMEZONE:{self._tz_str}",
+        ])
+        
+        # Process each day plan
+        for day_plan in itinerary.daily_plans:
+            # Every activity of a day shares the same categories
+            day_categories = ','.join(_escape(c) for c in ('Travel', day_plan.theme))
+            for activity in day_plan.morning + day_plan.afternoon + day_plan.evening:
+                extra = []
+                if activity.location.coordinates:
+                    extra.append(f"GEO:{activity.location.coordinates[1]};{activity.location.coordinates[0]}")
+                if activity.cost:
+                    extra.append(f"X-COST:{_escape(f'${activity.cost:.2f}')}")
+                if activity.booking_required:
+                    extra.append("X-BOOKING-REQUIRED:true")
+                
+                lines = []
+                self._emit_event(
+                    lines,
+                    uid=self._next_uid(),
+                    summary=activity.activity,
+                    description=self._format_activity_description(activity, day_plan),
+                    dtstart=self._parse_activity_time(day_plan.date, activity.start_time),
+                    dtend=self._parse_activity_time(day_plan.date, activity.end_time),
+                    location=activity.location.name,
+                    categories=day_categories,
+                    alarm_description=f"Reminder: {activity.activity}",
+                    alarm_minutes=30,
+                    extra=extra
+                )
+                yield _serialize(lines)
+        
+        # Add transport events
+        for transport in itinerary.transport_options[:2]:  # Add first 2 options
+            lines = []
+            self._emit_event(
+                lines,
+                uid=self._next_uid(),
+                summary=f"{transport.type.title()}: {transport.provider}",
+                description=self._format_transport_description(transport),
+                dtstart=transport.departure_time,
+                dtend=transport.arrival_time,
+                location='Airport' if transport.type == 'flight' else f"{transport.type.title()} Station",
+                categories="Travel,Transport",
+                alarm_description=f"Departure reminder: {transport.provider}",
+                # Remind 2 hours before flights, 30 minutes before others
+                alarm_minutes=120 if transport.type == 'flight' else 30
+            )
+            yield _serialize(lines)
+        
+        yield _CALENDAR_END
+    
+    def _next_uid(self) -> str:
+        """Generate the next event UID"""
+        uid = f"{self._uid_prefix}-{self._uid_counter}@tripcraft"
+        self._uid_counter += 1
+        return uid
+    
+    def _emit_event(self, lines: List[str], uid: str, summary: str, description: str,
+                    dtstart: datetime, dtend: datetime, location: str, categories: str,
+                    alarm_description: str, alarm_minutes: int, extra: Sequence[str] = ()):
+        """Append a VEVENT (with a display alarm) as unfolded content lines; categories is pre-escaped"""
+        lines.append("BEGIN:VEVENT")
+        lines.append(f"UID:{uid}")
+        lines.append(f"SUMMARY:{_escape(summary)}")
+        lines.append(f"DESCRIPTION:{_escape(description)}")
+        lines.append(f"LOCATION:{_escape(location)}")
+        lines.append(self._format_datetime("DTSTART", dtstart))
+        lines.append(self._format_datetime("DTEND", dtend))
+        lines.append(f"CATEGORIES:{categories}")
+        lines.extend(extra)
+        lines.append("BEGIN:VALARM")
+        lines.append("ACTION:DISPLAY")
+        lines.append(f"DESCRIPTION:{_escape(alarm_description)}")
+        lines.append(f"TRIGGER:-PT{alarm_minutes}M")
+        lines.append("END:VALARM")
+        lines.append("END:VEVENT")
+    
+    @staticmethod
+    def _format_datetime(name: str, dt: datetime) -> str:
+        """Format a DATE-TIME property: floating, UTC ("Z") or with a TZID parameter"""
+        if dt.tzinfo is None:
+            return f"{name}:{dt.strftime('%Y%m%dT%H%M%S')}"
+        zone = getattr(dt.tzinfo, 'zone', None)
+        if zone is None or zone == 'UTC':
+            return f"{name}:{dt.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')}"
+        return f"{name};TZID={zone}:{dt.strftime('%Y%m%dT%H%M%S')}"
+    
+    def _itinerary_to_ics_icalendar(self, itinerary: TravelPlanResponse) -> bytes:
+        """Convert travel itinerary to ICS using the icalendar library (fallback path)"""
         
         # Create calendar
         cal = Calendar()
@@ -29,7 +189,7 @@ class ICSExporter:
         # Add calendar properties
         cal.add('x-wr-calname', f"Trip to {itinerary.destination_info.name}")
         cal.add('x-wr-caldesc', itinerary.summary)
-        cal.add('x-wr-timezone', str(self.timezone))
+        cal.add('x-wr-timezone', self._tz_str)
         
         # Process each day plan
         for day_plan in itinerary.daily_plans:
@@ -39,19 +199,20 @@ class ICSExporter:
         for transport in itinerary.transport_options[:2]:  # Add first 2 options
             self._add_transport_event(cal, transport, itinerary)
         
-        return cal.to_ical().decode('utf-8')
+        return cal.to_ical()
     
     def _add_day_events(self, cal: Calendar, day_plan: DayPlan, itinerary: TravelPlanResponse):
         """Add daily activities to calendar"""
         
         # Combine all activities for the day
         all_activities = day_plan.morning + day_plan.afternoon + day_plan.evening
+        day_categories = ['Travel', day_plan.theme]
         
         for activity in all_activities:
             event = Event()
             
             # Generate unique ID
-            event.add('uid', str(uuid.uuid4()))
+            event.add('uid', self._next_uid())
             
             # Set event details
             event.add('summary', activity.activity)
@@ -72,7 +233,7 @@ class ICSExporter:
             event.add('dtend', end_datetime)
             
             # Add metadata
-            event.add('categories', ['Travel', day_plan.theme])
+            event.add('categories', day_categories)
             if activity.cost:
                 event.add('x-cost', f"${activity.cost:.2f}")
             if activity.booking_required:
@@ -90,21 +251,10 @@ class ICSExporter:
         """Add transport booking to calendar"""
         event = Event()
         
-        event.add('uid', str(uuid.uuid4()))
+        event.add('uid', self._next_uid())
         event.add('summary', f"{transport.type.title()}: {transport.provider}")
         
-        description = f"""
-Transport Details:
-- Provider: {transport.provider}
-- Duration: {transport.duration_minutes} minutes
-- Price: ${transport.price or 'TBD'}
-- Carbon Footprint: {transport.carbon_footprint or 'Unknown'}
-""".strip()
-        
-        if transport.booking_url:
-            description += f"\n\nBooking: {transport.booking_url}"
-        
-        event.add('description', description)
+        event.add('description', self._format_transport_description(transport))
         event.add('dtstart', transport.departure_time)
         event.add('dtend', transport.arrival_time)
         
@@ -125,24 +275,44 @@ Transport Details:
         
         cal.add_component(event)
     
-    def _parse_activity_time(self, date, time_str: str) -> datetime:
+    def _format_transport_description(self, transport) -> str:
+        """Format transport description for calendar"""
+        description_parts = [
+            "Transport Details:",
+            f"- Provider: {transport.provider}",
+            f"- Duration: {transport.duration_minutes} minutes",
+            f"- Price: ${transport.price or 'TBD'}",
+            f"- Carbon Footprint: {transport.carbon_footprint or 'Unknown'}"
+        ]
+        
+        if transport.booking_url:
+            description_parts.append(f"\nBooking: {transport.booking_url}")
+        
+        return "\n".join(description_parts)
+    
+    def _parse_activity_time(self, day, time_str: str) -> datetime:
         """Parse activity time string to datetime"""
-        try:
-            # Parse "HH:MM" format
-            time_parts = time_str.split(':')
-            hour = int(time_parts[0])
-            minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-            
-            # Combine with date
-            dt = datetime.combine(date, datetime.min.time().replace(hour=hour, minute=minute))
-            
-            # Localize to timezone
-            return self.timezone.localize(dt)
-            
-        except Exception:
-            # Fallback to noon
-            dt = datetime.combine(date, datetime.min.time().replace(hour=12))
-            return self.timezone.localize(dt)
+        hour_minute = self._time_cache.get(time_str)
+        if hour_minute is None:
+            try:
+                # Parse "HH:MM" format
+                time_parts = time_str.split(':')
+                hour = int(time_parts[0])
+                minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+                time(hour, minute)  # Validate range
+                hour_minute = (hour, minute)
+            except Exception:
+                # Fallback to noon
+                hour_minute = (12, 0)
+            self._time_cache[time_str] = hour_minute
+        
+        key = (day, *hour_minute)
+        localized = self._dt_cache.get(key)
+        if localized is None:
+            # Combine with date and localize to timezone
+            localized = self.timezone.localize(datetime.combine(day, time(*hour_minute)))
+            self._dt_cache[key] = localized
+        return localized
     
     def _format_activity_description(self, activity: ActivityBlock, day_plan: DayPlan) -> str:
         """Format activity description for calendar"""
@@ -176,7 +346,7 @@ Transport Details:
         cal.add('version', '2.0')
         
         event = Event()
-        event.add('uid', str(uuid.uuid4()))
+        event.add('uid', self._next_uid())
         event.add('summary', title)
         event.add('description', description)
         event.add('dtstart', start_time)
@@ -190,7 +360,7 @@ Transport Details:
         return cal.to_ical().decode('utf-8')
 
 # Standalone function for easy import
-def itinerary_to_ics(itinerary: TravelPlanResponse, timezone: str = "UTC") -> str:
+def itinerary_to_ics(itinerary: TravelPlanResponse, timezone: str = "UTC") -> bytes:
     """
     Convert travel itinerary to ICS calendar format
     
@@ -199,11 +369,19 @@ def itinerary_to_ics(itinerary: TravelPlanResponse, timezone: str = "UTC") -> st
         timezone: Target timezone for events
     
     Returns:
-        ICS calendar content as string
+        ICS calendar content as UTF-8 bytes
     """
     exporter = ICSExporter(timezone)
     return exporter.itinerary_to_ics(itinerary)
 
+def itinerary_to_ics_str(itinerary: TravelPlanResponse, timezone: str = "UTC") -> str:
+    """Convert travel itinerary to ICS calendar format as a string"""
+    return ICSExporter(timezone).itinerary_to_ics_str(itinerary)
+
+def iter_ics_lines(itinerary: TravelPlanResponse, timezone: str = "UTC") -> Iterator[bytes]:
+    """Yield ICS calendar content event by event, for streaming responses"""
+    return ICSExporter(timezone).iter_ics(itinerary)
+
 # Example usage and testing
 if __name__ == "__main__":
     from datetime import date
@@ -261,7 +439,7 @@ if __name__ == "__main__":
     
     # Generate ICS
     exporter = ICSExporter("Europe/Paris")
-    ics_content = exporter.itinerary_to_ics(sample_itinerary)
+    ics_content = exporter.itinerary_to_ics_str(sample_itinerary)
     
     # Save to file for testing
     with open("test_itinerary.ics", "w") as f:
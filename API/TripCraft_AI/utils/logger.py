@@ -17,7 +17,8 @@ def setup_logger():
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level="DEBUG" if settings.DEBUG else "INFO",
-        colorize=True
+        colorize=True,
+        enqueue=True  # Write from a background thread so logging never blocks the event loop
     )
     
     # Add file handler for production
@@ -27,7 +28,8 @@ def setup_logger():
             rotation="1 day",
             retention="30 days",
             level="INFO",
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+            enqueue=True
         )
     
     return logger